@@ -0,0 +1,14 @@
+from setuptools import Extension, setup
+
+try:
+    from Cython.Build import cythonize
+except ImportError:
+    ext_modules = []
+else:
+    # optional: fall back to the pure Python encoders when there is no compiler.
+    ext_modules = cythonize(
+        [Extension("geodude._geohash", ["src/geodude/_geohash.pyx"], optional=True)],
+        language_level=3,
+    )
+
+setup(ext_modules=ext_modules)
@@ -1 +1 @@
-from geodude.cluster_functions import calculate_geohashes
\ No newline at end of file
+from geodude.cluster_functions import calculate_geohash, calculate_geohashes, calculate_geohashes_np
\ No newline at end of file
@@ -0,0 +1,117 @@
+import itertools
+
+import numpy as np
+from numba import njit, prange, types
+
+
+_BASE32 = np.frombuffer(b"0123456789bcdefghjkmnpqrstuvwxyz", dtype=np.uint8)
+
+# Numba promotes uint64 mixed with int64 to float64, so keep every operand unsigned.
+_M16 = np.uint64(0x0000FFFF0000FFFF)
+_M8 = np.uint64(0x00FF00FF00FF00FF)
+_M4 = np.uint64(0x0F0F0F0F0F0F0F0F)
+_M2 = np.uint64(0x3333333333333333)
+_M1 = np.uint64(0x5555555555555555)
+_MASK5 = np.uint64(0x1F)
+_CELL_MAX = 4294967295.0
+_LAT_STEP = 180.0 / 2 ** 32
+_LON_STEP = 360.0 / 2 ** 32
+
+
+@njit(cache=True, inline="always")
+def _spread_bits(x):
+    x = (x | (x << np.uint64(16))) & _M16
+    x = (x | (x << np.uint64(8))) & _M8
+    x = (x | (x << np.uint64(4))) & _M4
+    x = (x | (x << np.uint64(2))) & _M2
+    x = (x | (x << np.uint64(1))) & _M1
+    return x
+
+
+@njit(cache=True, inline="always", boundscheck=False)
+def _encode_point(lat, lon, shift, precision, out, base):
+    # Negated so NaN counts as out of range.
+    if not (-90.0 <= lat <= 90.0 and -180.0 <= lon <= 180.0):
+        return False
+    lat_q = min(np.floor((lat + 90.0) / 180.0 * 4294967296.0), _CELL_MAX)
+    lon_q = min(np.floor((lon + 180.0) / 360.0 * 4294967296.0), _CELL_MAX)
+    # The sums can round a value just below a cell edge up onto it; edges are exact doubles.
+    if lat < lat_q * _LAT_STEP - 90.0:
+        lat_q -= 1.0
+    if lon < lon_q * _LON_STEP - 180.0:
+        lon_q -= 1.0
+    lat32 = np.uint64(lat_q)
+    lon32 = np.uint64(lon_q)
+    code = ((_spread_bits(lon32) << np.uint64(1)) | _spread_bits(lat32)) >> shift
+    for k in range(precision):
+        out[base + k] = _BASE32[(code >> np.uint64(5 * (precision - 1 - k))) & _MASK5]
+    return True
+
+
+# Explicit signatures compile (or load from cache) when a kernel is built rather
+# than on its first call. Inputs may be read-only (np.frombuffer, memmaps), and
+# Numba types those separately, so every writable/read-only pairing is listed.
+# No fastmath: it assumes no NaNs, and the range check must see them.
+_COORDS = (types.float64[::1], types.Array(types.float64, 1, "C", readonly=True))
+_SIGNATURES = [types.int64(lats, lons, types.uint8[::1]) for lats, lons in itertools.product(_COORDS, repeat=2)]
+
+
+# Each precision gets its own kernels with precision and the Morton shift baked
+# in as constants, so LLVM fully unrolls the base32 loop. Numba's on-disk cache
+# keys closures by their captured values, so every variant is compiled only once.
+# The serial and parallel kernels are built separately so that the serial one
+# never pays for compiling prange code.
+_KERNELS = {}
+
+
+def _kernel(precision, parallel):
+    key = (precision, parallel)
+    kernel = _KERNELS.get(key)
+    if kernel is None:
+        kernel = _KERNELS[key] = _build_kernel(precision, parallel)
+    return kernel
+
+
+def _build_kernel(precision, parallel):
+    shift = np.uint64(64 - 5 * precision)
+
+    if parallel:
+        @njit(_SIGNATURES, cache=True, parallel=True, nogil=True, boundscheck=False)
+        def parallel_kernel(lats, lons, out):
+            n = lats.shape[0]
+            bad = n
+            for i in prange(n):
+                if not _encode_point(lats[i], lons[i], shift, precision, out, i * precision):
+                    bad = min(bad, i)
+            return bad if bad < n else -1
+
+        return parallel_kernel
+
+    @njit(_SIGNATURES, cache=True, nogil=True, boundscheck=False)
+    def serial_kernel(lats, lons, out):
+        for i in range(lats.shape[0]):
+            if not _encode_point(lats[i], lons[i], shift, precision, out, i * precision):
+                return i
+        return -1
+
+    return serial_kernel
+
+
+def encode_batch(lats, lons, precision, out):
+    """Encode into ``out`` on all cores and return the first out-of-range index, or -1."""
+    return _kernel(precision, True)(lats, lons, out)
+
+
+def encode_batch_serial(lats, lons, precision, out):
+    """Single-threaded encode_batch, for batches too small to split across threads."""
+    return _kernel(precision, False)(lats, lons, out)
+
+
+def prepare_serial(precision):
+    """Compile (or load) encode_batch_serial's kernel for precision ahead of use."""
+    _kernel(precision, False)
+
+
+def has_serial_kernel(precision):
+    """Whether encode_batch_serial is already compiled (or loaded) for precision."""
+    return (precision, False) in _KERNELS
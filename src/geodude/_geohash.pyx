@@ -0,0 +1,59 @@
+# cython: language_level=3, boundscheck=False, wraparound=False
+from libc.math cimport floor
+from libc.stdint cimport uint64_t
+from libc.string cimport memcpy
+
+
+cdef const char *_ALPHABET = b"0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+cdef inline uint64_t _spread(uint64_t x) noexcept nogil:
+    x = (x | (x << 16)) & 0x0000FFFF0000FFFFULL
+    x = (x | (x << 8)) & 0x00FF00FF00FF00FFULL
+    x = (x | (x << 4)) & 0x0F0F0F0F0F0F0F0FULL
+    x = (x | (x << 2)) & 0x3333333333333333ULL
+    x = (x | (x << 1)) & 0x5555555555555555ULL
+    return x
+
+
+cdef inline uint64_t _cell(double v, double low, double span) noexcept nogil:
+    cdef double q = floor((v - low) / span * 4294967296.0)
+    if q > 4294967295.0:
+        q = 4294967295.0
+    # v - low can round a value just below a cell edge up onto it; the edges are
+    # exact doubles, so step such values back into their own cell.
+    if v < q * (span / 4294967296.0) + low:
+        q -= 1.0
+    return <uint64_t>q
+
+
+def encode_batch(const double[::1] lats, const double[::1] lons, int precision, unsigned char[::1] out):
+    """Encode into ``out`` and return the first out-of-range index, or -1."""
+    cdef Py_ssize_t i, n = lats.shape[0], bad = -1
+    cdef int k, shift = 64 - 5 * precision
+    cdef double lat, lon
+    # Real codes use at most 60 bits, so the first point never matches prev.
+    cdef uint64_t code, prev = ~(<uint64_t>0)
+    cdef unsigned char *dst
+    with nogil:
+        for i in range(n):
+            lat = lats[i]
+            lon = lons[i]
+            # Check the raw values: lat + 90.0 can round a just-too-large latitude
+            # down onto the edge of the grid. Negated so NaN is rejected too.
+            if not (-90.0 <= lat <= 90.0 and -180.0 <= lon <= 180.0):
+                bad = i
+                break
+            code = _spread(_cell(lat, -90.0, 180.0))
+            code |= _spread(_cell(lon, -180.0, 360.0)) << 1
+            code >>= shift
+            dst = &out[i * precision]
+            # Consecutive points in the same cell (e.g. a slow GPS track) repeat the hash.
+            if code == prev:
+                memcpy(dst, dst - precision, precision)
+                continue
+            prev = code
+            for k in range(precision - 1, -1, -1):
+                dst[k] = _ALPHABET[code & 0x1F]
+                code >>= 5
+    return bad
@@ -0,0 +1,46 @@
+import numpy as np
+
+from geodude._swar import morton
+
+
+_BASE32 = np.frombuffer(b"0123456789bcdefghjkmnpqrstuvwxyz", dtype=np.uint8)
+_CELL_MAX = 0xFFFFFFFF
+# Above this many points the (n, precision) broadcast temporaries cost more than
+# the per-character NumPy calls they save.
+_BROADCAST_MAX = 1024
+
+# Per precision: how far to shift the 64-bit Morton code to keep its top
+# 5 * precision bits, and where each character's 5-bit group then sits.
+_PRECISION_TABLE = (None,) + tuple(
+    (64 - 5 * p, np.arange(5 * (p - 1), -1, -5, dtype=np.uint64)) for p in range(1, 13)
+)
+
+
+def _quantize(values, low, span):
+    # Scale [low, low + span] onto [0, 2**32); the top edge maps to the last cell.
+    q = np.minimum(np.floor(np.ldexp((values - low) / span, 32)), _CELL_MAX)
+    # values - low can round a value just below a cell edge up onto it. The edges
+    # are exact doubles, so step those values back into the cell they lie in.
+    q -= values < q * (span / 2 ** 32) + low
+    return q.astype(np.uint64)
+
+
+def encode_batch(lats, lons, precision):
+    """Encode validated float64 arrays into a ``|S{precision}`` array using only NumPy."""
+    code_shift, char_shifts = _PRECISION_TABLE[precision]
+    lat32 = _quantize(lats, -90.0, 180.0)
+    lon32 = _quantize(lons, -180.0, 360.0)
+    # Geohash bits alternate starting with longitude, so it takes the odd slots.
+    codes = morton(lat32, lon32) >> code_shift
+    out = np.empty(len(codes), dtype=f"S{precision}")
+    chars = out.view(np.uint8).reshape(len(codes), precision)
+    if len(codes) < _BROADCAST_MAX:
+        # One broadcast shift for every character: fewest NumPy calls.
+        groups = codes[:, None] >> char_shifts
+        groups &= 0x1F
+        np.take(_BASE32, groups, out=chars, mode="clip")
+    else:
+        # Column at a time keeps the index temporaries small and cache-resident.
+        for k, shift in enumerate(char_shifts.tolist()):
+            np.take(_BASE32, (codes >> shift) & 0x1F, out=chars[:, k], mode="clip")
+    return out
@@ -0,0 +1,16 @@
+def _spread(x):
+    # Move bit i of a 32-bit value to bit 2*i of a 64-bit value.
+    x = (x | (x << 16)) & 0x0000FFFF0000FFFF
+    x = (x | (x << 8)) & 0x00FF00FF00FF00FF
+    x = (x | (x << 4)) & 0x0F0F0F0F0F0F0F0F
+    x = (x | (x << 2)) & 0x3333333333333333
+    x = (x | (x << 1)) & 0x5555555555555555
+    return x
+
+
+def morton(x, y):
+    """Interleave two 32-bit values into a 64-bit Morton code, y in the odd bits.
+
+    Works on Python ints and element-wise on uint64 NumPy arrays alike.
+    """
+    return _spread(x) | (_spread(y) << 1)
@@ -1,15 +1,237 @@
-from pygeodesy import geohash
+import functools
+import operator
+import sys
+import threading
+from collections import OrderedDict
+from itertools import repeat
 
+import numpy as np
 
-geohash_data = {}
+from geodude import _numpy_encode
+from geodude._swar import morton
 
-def calculate_geohashes(lats, lons, precision):
-    hashes = []
-    for lat, lon in zip(lats, lons):
-        if (lat, lon, precision) in geohash_data:
-            h = geohash_data[(lat, lon, precision)]
-        else:
-            h = geohash.encode(lat, lon, precision)
-            geohash_data[(lat, lon, precision)] = h
-        hashes.append(h)
-    return hashes
\ No newline at end of file
+try:
+    from geodude._geohash import encode_batch as _cython_encode_batch
+except ImportError:
+    _cython_encode_batch = None
+
+
+# LRU memo for calculate_geohash, where callers tend to repeat the same point.
+geohash_data = OrderedDict()
+_GEOHASH_DATA_MAX = 65536
+# Another thread can evict a key between lookup and move_to_end, so hold this across both.
+_geohash_data_lock = threading.Lock()
+
+# Whole calculate_geohashes results kept for callers that repeat the same
+# coordinate lists. Each entry keeps its input tuples and output strings alive,
+# so only inputs up to _RESULT_CACHE_MAX_LEN points are cached.
+_RESULT_CACHE_SIZE = 128
+_RESULT_CACHE_MAX_LEN = 1024
+
+# Below this many points the per-point path beats the array setup cost.
+_VECTORIZE_MIN = 16
+# Only worth starting Numba's thread pool for batches at least this large.
+_PARALLEL_MIN = 512
+
+_ALPHABET = b"0123456789bcdefghjkmnpqrstuvwxyz"
+_CELL_MAX = 0xFFFFFFFF
+
+
+@functools.lru_cache(maxsize=None)
+def _numba():
+    # geodude._fast, or None; imported lazily since numba is slow to load.
+    try:
+        from geodude import _fast
+    except ImportError:
+        return None
+    return _fast
+
+
+def _run_kernel(kernel, lats, lons, precision):
+    # Compiled kernels range-check as they encode, so the input is read once,
+    # and report the first bad index for the usual error message.
+    out = np.empty(len(lats), dtype=f"S{precision}")
+    bad = kernel(lats, lons, precision, out.view(np.uint8))
+    if bad >= 0:
+        _check_ranges(lats[bad:bad + 1], lons[bad:bad + 1])
+    return out
+
+
+def _encode_batch(lats, lons, precision):
+    if len(lats) >= _PARALLEL_MIN:
+        fast = _numba()
+        if fast is not None:
+            out = _run_kernel(fast.encode_batch, lats, lons, precision)
+            # Numba is loaded anyway, so build this precision's serial kernel for
+            # later mid-sized batches here rather than on one of their calls.
+            fast.prepare_serial(precision)
+            return out
+    return _encode_serial(lats, lons, precision)
+
+
+def _encode_serial(lats, lons, precision):
+    if _cython_encode_batch is not None:
+        return _run_kernel(_cython_encode_batch, lats, lons, precision)
+    # Loading numba or compiling a kernel takes far longer than NumPy needs for a
+    # batch this small, so only use a serial kernel a large batch has already built.
+    fast = sys.modules.get("geodude._fast")
+    if fast is not None and fast.has_serial_kernel(precision):
+        return _run_kernel(fast.encode_batch_serial, lats, lons, precision)
+    return _encode_numpy(lats, lons, precision)
+
+
+def _encode_numpy(lats, lons, precision):
+    _check_ranges(lats, lons)
+    return _numpy_encode.encode_batch(lats, lons, precision)
+
+
+class _BadCoord(ValueError):
+    # Keeps the offending value; the message is only formatted when shown.
+    _LIMITS = {"Latitude": 90, "Longitude": 180}
+
+    def __init__(self, kind, value):
+        super().__init__(kind, value)
+        self.kind = kind
+        self.value = value
+
+    def __str__(self):
+        limit = self._LIMITS[self.kind]
+        return f"{self.kind} must be between -{limit} and {limit}, got {self.value}"
+
+
+def _check_precision(precision):
+    # Normalized to int so 5, np.int64(5) and True share cache keys and dtypes,
+    # while 5.0 is rejected instead of matching a cached 5.
+    precision = operator.index(precision)
+    if not 1 <= precision <= 12:
+        raise ValueError(f"Precision must be between 1 and 12, got {precision}")
+    return precision
+
+
+def _in_range(values, limit):
+    # min/max reductions propagate NaN, so "a <= b" rejects it as well.
+    return not values.size or (-limit <= values.min() and values.max() <= limit)
+
+
+def _as_float64(values):
+    if isinstance(values, (list, tuple)):
+        # Unbox in one C loop into a buffer sized up front.
+        return np.fromiter(values, dtype=np.float64, count=len(values))
+    # ndarrays, array.array and other buffers of doubles are used without a copy.
+    return np.require(values, dtype=np.float64, requirements="C")
+
+
+def _coordinate_arrays(lats, lons, precision):
+    precision = _check_precision(precision)
+    lats = _as_float64(lats)
+    lons = _as_float64(lons)
+    if lats.shape != lons.shape:
+        raise ValueError("lats and lons must be the same length")
+    return lats, lons, precision
+
+
+def _check_ranges(lats, lons):
+    if _in_range(lats, 90) and _in_range(lons, 180):
+        return
+    # Report the first bad point, latitude before longitude, as the kernels do.
+    ok = (lats >= -90) & (lats <= 90) & (lons >= -180) & (lons <= 180)
+    i = int(np.argmax(~ok))
+    if not -90.0 <= lats[i] <= 90.0:
+        raise _BadCoord("Latitude", lats.item(i))
+    raise _BadCoord("Longitude", lons.item(i))
+
+
+@functools.lru_cache(maxsize=None)
+def _specialized_encoder(precision):
+    # Generate an encoder with the base32 extraction unrolled for one precision,
+    # so every shift is a constant and there is no per-character loop.
+    # The sums can round a value just below a cell edge up onto it; the edges are
+    # exact doubles, so such values are stepped back a cell.
+    chars = ", ".join(f"_A[(code >> {5 * k}) & 0x1F]" for k in range(precision - 1, -1, -1))
+    src = (
+        "def encode(lat, lon):\n"
+        f"    lat32 = min(int((lat + 90.0) / 180.0 * 4294967296.0), {_CELL_MAX})\n"
+        f"    if lat < lat32 * {180.0 / 2 ** 32!r} - 90.0:\n"
+        "        lat32 -= 1\n"
+        f"    lon32 = min(int((lon + 180.0) / 360.0 * 4294967296.0), {_CELL_MAX})\n"
+        f"    if lon < lon32 * {360.0 / 2 ** 32!r} - 180.0:\n"
+        "        lon32 -= 1\n"
+        f"    code = _morton(lat32, lon32) >> {64 - 5 * precision}\n"
+        f"    return bytes(({chars},)).decode('ascii')\n"
+    )
+    namespace = {"_A": _ALPHABET, "_morton": morton}
+    exec(src, namespace)
+    return namespace["encode"]
+
+
+def _encode_unchecked(lat, lon, precision):
+    return _specialized_encoder(precision)(lat, lon)
+
+
+def _calculate_single_geohash(lat, lon, precision):
+    precision = _check_precision(precision)
+    # NumPy scalars such as np.float32 would keep the quantize step in their own precision.
+    lat = float(lat)
+    lon = float(lon)
+    if not -90.0 <= lat <= 90.0:
+        raise _BadCoord("Latitude", lat)
+    if not -180.0 <= lon <= 180.0:
+        raise _BadCoord("Longitude", lon)
+    return _encode_unchecked(lat, lon, precision)
+
+
+def calculate_geohash(lat, lon, precision):
+    precision = _check_precision(precision)
+    key = (lat, lon, precision)
+    with _geohash_data_lock:
+        h = geohash_data.get(key)
+        if h is not None:
+            geohash_data.move_to_end(key)
+            return h
+    h = _calculate_single_geohash(lat, lon, precision)
+    with _geohash_data_lock:
+        geohash_data[key] = h
+        if len(geohash_data) > _GEOHASH_DATA_MAX:
+            geohash_data.popitem(last=False)
+    return h
+
+
+def calculate_geohashes_np(lats, lons, precision):
+    """Encode coordinates into a ``|S{precision}`` NumPy array of geohashes.
+
+    lats and lons may be lists, tuples, NumPy arrays or any buffer of floats
+    such as ``array.array('d')``; float64 buffers are read without copying.
+    """
+    lats, lons, precision = _coordinate_arrays(lats, lons, precision)
+    return _encode_batch(lats, lons, precision)
+
+
+@functools.lru_cache(maxsize=_RESULT_CACHE_SIZE)
+def _calculate_cached(lats, lons, precision):
+    # Stored as a tuple so no caller can mutate a cached result.
+    return tuple(_calculate_geohashes(lats, lons, precision))
+
+
+def calculate_geohashes(lats, lons, precision, *, as_array=False):
+    # Before the cache lookup, so a bad precision fails the same way every call.
+    precision = _check_precision(precision)
+    if as_array:
+        # precision bytes per hash instead of a str object each.
+        return calculate_geohashes_np(lats, lons, precision)
+    if (
+        isinstance(lats, (list, tuple))
+        and isinstance(lons, (list, tuple))
+        and len(lats) <= _RESULT_CACHE_MAX_LEN
+    ):
+        return list(_calculate_cached(tuple(lats), tuple(lons), precision))
+    return _calculate_geohashes(lats, lons, precision)
+
+
+def _calculate_geohashes(lats, lons, precision):
+    if len(lats) >= _VECTORIZE_MIN:
+        return [h.decode("ascii") for h in calculate_geohashes_np(lats, lons, precision).tolist()]
+    # A few points: plain float compares beat converting to arrays and back.
+    precision = _check_precision(precision)
+    if len(lats) != len(lons):
+        raise ValueError("lats and lons must be the same length")
+    return list(map(_calculate_single_geohash, lats, lons, repeat(precision)))
@@ -0,0 +1,244 @@
+import re
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pytest
+from pygeodesy import geohash
+
+from geodude import calculate_geohash, calculate_geohashes, calculate_geohashes_np
+from geodude import cluster_functions
+
+
+PRECISIONS = range(1, 13)
+
+
+def _points():
+    rng = np.random.default_rng(0)
+    lats = list(rng.uniform(-90, 90, 200))
+    lons = list(rng.uniform(-180, 180, 200))
+    # Poles, antimeridian and the origin, each twice in a row so repeated cells are covered.
+    for lat in (-90.0, 0.0, 90.0):
+        for lon in (-180.0, 0.0, 180.0):
+            lats += [lat, lat]
+            lons += [lon, lon]
+    # Cell edges at every precision and the doubles either side of them.
+    for precision in PRECISIONS:
+        lat_bits = 5 * precision // 2
+        lon_bits = 5 * precision - lat_bits
+        for bits, low, span, axis in ((lat_bits, -90.0, 180.0, lats), (lon_bits, -180.0, 360.0, lons)):
+            other = lons if axis is lats else lats
+            other_low = -180.0 if axis is lats else -90.0
+            for k in (1, 2 ** bits - 1, *rng.integers(1, 2 ** bits, 3)):
+                edge = low + span * int(k) / 2 ** bits
+                for value in (np.nextafter(edge, -np.inf), edge, np.nextafter(edge, np.inf)):
+                    axis.append(float(value))
+                    other.append(float(rng.uniform(other_low, -other_low)))
+    return np.array(lats), np.array(lons)
+
+
+LATS, LONS = _points()
+
+
+def _expected(lats, lons, precision):
+    return [geohash.encode(lat, lon, precision) for lat, lon in zip(lats.tolist(), lons.tolist())]
+
+
+def _decode(hashes):
+    return [h.decode("ascii") for h in hashes.tolist()]
+
+
+def _numba_encoder(name):
+    def encode(lats, lons, precision):
+        fast = cluster_functions._numba()
+        if fast is None:
+            pytest.skip("numba is not installed")
+        return _decode(cluster_functions._run_kernel(getattr(fast, name), lats, lons, precision))
+    return encode
+
+
+def _cython_encode(lats, lons, precision):
+    if cluster_functions._cython_encode_batch is None:
+        pytest.skip("the Cython extension is not built")
+    return _decode(cluster_functions._run_kernel(cluster_functions._cython_encode_batch, lats, lons, precision))
+
+
+ENCODERS = {
+    "scalar": lambda lats, lons, precision: [
+        cluster_functions._calculate_single_geohash(lat, lon, precision) for lat, lon in zip(lats, lons)
+    ],
+    "numpy": lambda lats, lons, precision: _decode(cluster_functions._encode_numpy(lats, lons, precision)),
+    "cython": _cython_encode,
+    "numba": _numba_encoder("encode_batch"),
+    "numba-serial": _numba_encoder("encode_batch_serial"),
+}
+
+
+@pytest.fixture(params=sorted(ENCODERS))
+def encode(request):
+    return ENCODERS[request.param]
+
+
+@pytest.mark.parametrize("precision", PRECISIONS)
+def test_encoders_match_pygeodesy(encode, precision):
+    # Tiled past 1024 points too, where the NumPy encoder switches strategy.
+    for reps in (1, 3):
+        lats, lons = np.tile(LATS, reps), np.tile(LONS, reps)
+        assert encode(lats, lons, precision) == _expected(lats, lons, precision)
+
+
+@pytest.mark.parametrize("n", [5, 100, 700])
+@pytest.mark.parametrize("precision", PRECISIONS)
+def test_calculate_geohashes_matches_pygeodesy(n, precision):
+    lats, lons = LATS[-n:], LONS[-n:]
+    expected = _expected(lats, lons, precision)
+    assert calculate_geohashes(lats, lons, precision) == expected
+    assert calculate_geohashes(lats.tolist(), lons.tolist(), precision) == expected
+    assert _decode(calculate_geohashes_np(lats, lons, precision)) == expected
+    assert _decode(calculate_geohashes(lats, lons, precision, as_array=True)) == expected
+
+
+@pytest.mark.parametrize("precision", PRECISIONS)
+def test_calculate_geohash_matches_pygeodesy(precision):
+    for lat, lon, h in zip(LATS.tolist(), LONS.tolist(), _expected(LATS, LONS, precision)):
+        assert calculate_geohash(lat, lon, precision) == h
+
+
+def test_calculate_geohash_float32():
+    lats = np.random.default_rng(1).uniform(-90, 90, 200).astype(np.float32)
+    lons = np.random.default_rng(2).uniform(-180, 180, 200).astype(np.float32)
+    for lat, lon in zip(lats, lons):
+        assert calculate_geohash(lat, lon, 12) == geohash.encode(float(lat), float(lon), 12)
+
+
+@pytest.mark.parametrize("n", [5, 100, 700])
+def test_read_only_input(n):
+    lats = np.frombuffer(LATS[-n:].tobytes())
+    lons = np.frombuffer(LONS[-n:].tobytes())
+    assert calculate_geohashes(lats, lons, 7) == _expected(lats, lons, 7)
+
+
+def test_calculate_geohash_threads(monkeypatch):
+    monkeypatch.setattr(cluster_functions, "_GEOHASH_DATA_MAX", 4)
+    errors = []
+
+    def run():
+        try:
+            for i in range(2000):
+                calculate_geohash(float(i % 9), 0.0, 5)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=run) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == []
+
+
+def test_cached_result_cannot_be_mutated():
+    lats, lons = LATS[:100].tolist(), LONS[:100].tolist()
+    expected = _expected(LATS[:100], LONS[:100], 6)
+    first = calculate_geohashes(lats, lons, 6)
+    first[0] = "mutated"
+    first.append("extra")
+    assert calculate_geohashes(lats, lons, 6) == expected
+
+
+def test_long_inputs_bypass_result_cache(monkeypatch):
+    monkeypatch.setattr(cluster_functions, "_RESULT_CACHE_MAX_LEN", 50)
+    cluster_functions._calculate_cached.cache_clear()
+    calculate_geohashes(LATS[:50].tolist(), LONS[:50].tolist(), 6)
+    assert cluster_functions._calculate_cached.cache_info().currsize == 1
+    lats, lons = LATS[:51].tolist(), LONS[:51].tolist()
+    assert calculate_geohashes(lats, lons, 6) == _expected(LATS[:51], LONS[:51], 6)
+    assert cluster_functions._calculate_cached.cache_info().currsize == 1
+
+
+def test_geohash_data_evicts_least_recently_used(monkeypatch):
+    monkeypatch.setattr(cluster_functions, "_GEOHASH_DATA_MAX", 3)
+    monkeypatch.setattr(cluster_functions, "geohash_data", OrderedDict())
+    for lat in (1.0, 2.0, 3.0):
+        calculate_geohash(lat, 0.0, 5)
+    calculate_geohash(1.0, 0.0, 5)  # a hit makes 1.0 the most recently used key
+    calculate_geohash(4.0, 0.0, 5)
+    assert list(cluster_functions.geohash_data) == [(3.0, 0.0, 5), (1.0, 0.0, 5), (4.0, 0.0, 5)]
+    assert calculate_geohash(1.0, 0.0, 5) == geohash.encode(1.0, 0.0, 5)
+
+
+BAD_POINTS = [
+    (91.0, 0.0, "Latitude must be between -90 and 90, got 91.0"),
+    (-90.5, 0.0, "Latitude must be between -90 and 90, got -90.5"),
+    (float("nan"), 0.0, "Latitude must be between -90 and 90, got nan"),
+    (0.0, 180.5, "Longitude must be between -180 and 180, got 180.5"),
+    (0.0, -181.0, "Longitude must be between -180 and 180, got -181.0"),
+    (0.0, float("nan"), "Longitude must be between -180 and 180, got nan"),
+    (91.0, 181.0, "Latitude must be between -90 and 90, got 91.0"),
+]
+
+
+@pytest.mark.parametrize("lat, lon, message", BAD_POINTS)
+def test_encoders_reject_bad_points(encode, lat, lon, message):
+    lats, lons = LATS[:600].copy(), LONS[:600].copy()
+    lats[300], lons[300] = lat, lon
+    with pytest.raises(ValueError, match=re.escape(message)):
+        encode(lats, lons, 6)
+
+
+@pytest.mark.parametrize("n", [5, 100, 700])
+@pytest.mark.parametrize("lat, lon, message", BAD_POINTS)
+def test_calculate_geohashes_rejects_bad_points(n, lat, lon, message):
+    lats, lons = LATS[:n].copy(), LONS[:n].copy()
+    lats[n // 2], lons[n // 2] = lat, lon
+    with pytest.raises(ValueError, match=re.escape(message)):
+        calculate_geohashes(lats, lons, 6)
+    with pytest.raises(ValueError, match=re.escape(message)):
+        calculate_geohashes(lats.tolist(), lons.tolist(), 6)
+
+
+@pytest.mark.parametrize("lat, lon, message", BAD_POINTS)
+def test_calculate_geohash_rejects_bad_points(lat, lon, message):
+    with pytest.raises(ValueError, match=re.escape(message)):
+        calculate_geohash(lat, lon, 6)
+
+
+@pytest.mark.parametrize("n", [5, 100, 700])
+def test_first_bad_point_is_reported(encode, n):
+    # A bad longitude early wins over a bad latitude later, whatever the path.
+    lats, lons = LATS[:n].copy(), LONS[:n].copy()
+    lats[-1], lons[1] = 91.0, 181.0
+    message = "Longitude must be between -180 and 180, got 181.0"
+    with pytest.raises(ValueError, match=re.escape(message)):
+        encode(lats, lons, 6)
+    with pytest.raises(ValueError, match=re.escape(message)):
+        calculate_geohashes(lats, lons, 6)
+
+
+@pytest.mark.parametrize("precision", [0, 13])
+def test_bad_precision(precision):
+    message = f"Precision must be between 1 and 12, got {precision}"
+    for n in (5, 100):
+        with pytest.raises(ValueError, match=message):
+            calculate_geohashes(LATS[:n], LONS[:n], precision)
+    with pytest.raises(ValueError, match=message):
+        calculate_geohash(0.0, 0.0, precision)
+
+
+@pytest.mark.parametrize("n", [5, 100])
+def test_length_mismatch(n):
+    with pytest.raises(ValueError, match="lats and lons must be the same length"):
+        calculate_geohashes(LATS[:n], LONS[:n + 1], 6)
+
+
+def test_precision_must_be_an_integer():
+    lats, lons = [1.0] * 20, [2.0] * 20
+    expected = calculate_geohashes(lats, lons, 5)
+    assert calculate_geohashes(lats, lons, np.int64(5)) == expected
+    # Still rejected after the integer call above has been cached.
+    for n in (5, 20):
+        with pytest.raises(TypeError):
+            calculate_geohashes(lats[:n], lons[:n], 5.0)
+    calculate_geohash(1.0, 2.0, 5)
+    with pytest.raises(TypeError):
+        calculate_geohash(1.0, 2.0, 5.0)